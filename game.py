@@ -1,9 +1,11 @@
 
 import pygame
 import math
+import os
 import random
 import sys
-from enum import Enum
+from levels import (PowerUpType, MotionPattern, Physics, Level,
+                    load_level_pack)
 # Initialize Pygame
 pygame.init()
 pygame.mixer.init()
@@ -16,6 +18,16 @@ GRAVITY = 0.5
 BOUNCE_DAMPING = 0.85
 PADDLE_SPEED = 20
 BALL_RADIUS = 12
+LEVEL_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.json")
+LEVEL_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.pack")
+
+# Used when no level set is available; obstacles are then placed randomly
+DEFAULT_LEVEL = Level(
+    Physics(GRAVITY, BOUNCE_DAMPING, PADDLE_SPEED, BALL_RADIUS),
+    0.002,
+    tuple(1.0 for _ in PowerUpType),
+    (),
+)
 
 # Colors (Neon Theme)
 class Colors:
@@ -31,13 +43,6 @@ class Colors:
     DARK_PURPLE = (40, 0, 60)
     GLOW_BLUE = (100, 200, 255)
 
-class PowerUpType(Enum):
-    MULTI_BALL = 1
-    SLOW_TIME = 2
-    MEGA_BOUNCE = 3
-    SHIELD = 4
-    POINTS_2X = 5
-
 class Particle:
     """Particle effect for visual enhancement"""
     def __init__(self, x, y, color, velocity=(0, 0)):
@@ -65,12 +70,14 @@ class Particle:
 
 class Ball:
     """Enhanced ball with trail effects and physics"""
-    def __init__(self, x, y, color=Colors.NEON_CYAN):
+    def __init__(self, x, y, color=Colors.NEON_CYAN, physics=DEFAULT_LEVEL.physics):
         self.x = x
         self.y = y
         self.vx = random.uniform(-5, 5)
         self.vy = 0
-        self.radius = BALL_RADIUS
+        self.radius = physics.ball_radius
+        self.gravity = physics.gravity
+        self.bounce_damping = physics.bounce_damping
         self.color = color
         self.trail = []
         self.max_trail_length = 10
@@ -79,7 +86,7 @@ class Ball:
         
     def update(self, slow_factor=1.0):
         # Apply physics
-        self.vy += GRAVITY * slow_factor
+        self.vy += self.gravity * slow_factor
         self.x += self.vx * slow_factor
         self.y += self.vy * slow_factor
         
@@ -90,12 +97,12 @@ class Ball:
         
         # Boundary checking
         if self.x <= self.radius or self.x >= SCREEN_WIDTH - self.radius:
-            self.vx = -self.vx * BOUNCE_DAMPING
+            self.vx = -self.vx * self.bounce_damping
             self.x = max(self.radius, min(SCREEN_WIDTH - self.radius, self.x))
             
         # Top boundary
         if self.y <= self.radius:
-            self.vy = abs(self.vy) * BOUNCE_DAMPING
+            self.vy = abs(self.vy) * self.bounce_damping
             self.y = self.radius
             
     def draw(self, screen):
@@ -198,19 +205,39 @@ class PowerUp:
 
 class Obstacle:
     """Moving obstacles to avoid"""
-    def __init__(self, x, y, width, height, speed):
+    def __init__(self, x, y, width, height, speed,
+                 pattern=MotionPattern.HORIZONTAL, amplitude=0):
         self.x = x
         self.y = y
+        self.origin_y = y
+        self.phase = x * 0.02  # Sine motion starts from the spawn height
         self.width = width
         self.height = height
         self.vx = speed
+        self.pattern = pattern
+        self.amplitude = amplitude
         self.color = Colors.NEON_PURPLE
         
     def update(self):
+        if self.pattern == MotionPattern.STATIC:
+            return
+        
+        if self.pattern == MotionPattern.VERTICAL:
+            # Move up and down around the starting height
+            self.y += self.vx
+            if abs(self.y - self.origin_y) >= self.amplitude:
+                self.vx = -self.vx
+                self.y = max(self.origin_y - self.amplitude,
+                             min(self.origin_y + self.amplitude, self.y))
+            return
+            
         self.x += self.vx
         if self.x <= 0 or self.x >= SCREEN_WIDTH - self.width:
             self.vx = -self.vx
             
+        if self.pattern == MotionPattern.SINE:
+            self.y = self.origin_y + math.sin(self.x * 0.02 - self.phase) * self.amplitude
+            
     def draw(self, screen):
         pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
         pygame.draw.rect(screen, Colors.WHITE, (self.x, self.y, self.width, self.height), 2)
@@ -225,17 +252,24 @@ class NeonBounceGame:
         self.font_medium = pygame.font.Font(None, 36)
         self.font_small = pygame.font.Font(None, 24)
         
+        # Levels are decoded once; restarts reuse the ones that did not change
+        self.level_pack = load_level_pack(LEVEL_SOURCE, LEVEL_PACK)
+        
         self.reset_game()
         
     def reset_game(self):
+        if self.level_pack is not None:
+            self.level_pack.refresh()
+        self.level = 1
+        self.current_level = self.get_level_data()
+        
         self.paddle = Paddle()
-        self.balls = [Ball(SCREEN_WIDTH // 2, 100)]
+        self.balls = [self.create_ball(SCREEN_WIDTH // 2, 100)]
         self.particles = []
         self.power_ups = []
         self.obstacles = []
         
         self.score = 0
-        self.level = 1
         self.lives = 3
         self.combo = 0
         self.max_combo = 0
@@ -250,9 +284,36 @@ class NeonBounceGame:
         # Create initial obstacles
         self.spawn_obstacles()
         
+    def get_level_data(self):
+        """Get layout, physics and power-up table for the current level"""
+        if self.level_pack is None:
+            return DEFAULT_LEVEL
+        return self.level_pack.level(self.level)
+        
+    def create_ball(self, x, y, color=Colors.NEON_CYAN):
+        """Create a ball using the current level's physics"""
+        return Ball(x, y, color, self.current_level.physics)
+        
+    def apply_physics(self, physics):
+        """Apply level physics to the paddle and balls in play"""
+        self.paddle.speed = physics.paddle_speed
+        for ball in self.balls:
+            ball.radius = physics.ball_radius
+            ball.gravity = physics.gravity
+            ball.bounce_damping = physics.bounce_damping
+            
     def spawn_obstacles(self):
         """Spawn obstacles based on level"""
+        self.current_level = self.get_level_data()
+        self.apply_physics(self.current_level.physics)
         self.obstacles.clear()
+        
+        if self.level_pack is not None:
+            for spec in self.current_level.obstacles:
+                self.obstacles.append(Obstacle(spec.x, spec.y, spec.width, spec.height,
+                                               spec.speed, spec.pattern, spec.amplitude))
+            return
+            
         for i in range(min(self.level, 5)):
             x = random.randint(100, SCREEN_WIDTH - 150)
             y = random.randint(200, 400)
@@ -262,9 +323,10 @@ class NeonBounceGame:
             
     def spawn_power_up(self):
         """Randomly spawn power-ups"""
-        if random.random() < 0.002:  # 0.2% chance per frame
+        if random.random() < self.current_level.power_up_chance:
             x = random.randint(50, SCREEN_WIDTH - 50)
-            power_type = random.choice(list(PowerUpType))
+            power_type = random.choices(list(PowerUpType),
+                                        weights=self.current_level.power_up_weights)[0]
             self.power_ups.append(PowerUp(x, -30, power_type))
             
     def handle_collision(self, ball, paddle):
@@ -323,9 +385,9 @@ class NeonBounceGame:
         if power_type == PowerUpType.MULTI_BALL:
             # Add 2 extra balls
             for _ in range(2):
-                new_ball = Ball(self.balls[0].x, self.balls[0].y, 
-                              random.choice([Colors.NEON_CYAN, Colors.NEON_PINK, 
-                                           Colors.NEON_GREEN]))
+                new_ball = self.create_ball(self.balls[0].x, self.balls[0].y, 
+                                            random.choice([Colors.NEON_CYAN, Colors.NEON_PINK, 
+                                                           Colors.NEON_GREEN]))
                 self.balls.append(new_ball)
                 
         elif power_type == PowerUpType.SLOW_TIME:
@@ -388,7 +450,7 @@ class NeonBounceGame:
             # Add new ball if all balls are gone
             if len(self.balls) == 0:
                 if self.lives > 0:
-                    self.balls.append(Ball(SCREEN_WIDTH // 2, 100))
+                    self.balls.append(self.create_ball(SCREEN_WIDTH // 2, 100))
                 else:
                     self.game_over = True
                     
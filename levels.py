@@ -0,0 +1,292 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections import namedtuple
+from enum import Enum
+
+# Pack file layout (little-endian):
+#   header: magic, version, level count
+#   index:  one (offset, size, crc32) entry per level
+#   levels: level header, power-up weights, obstacle records
+PACK_MAGIC = b"NBLP"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHH")
+INDEX_ENTRY = struct.Struct("<III")
+LEVEL_HEADER = struct.Struct("<fffHHHH")
+WEIGHT = struct.Struct("<f")
+OBSTACLE = struct.Struct("<ffffffB")
+
+class PowerUpType(Enum):
+    MULTI_BALL = 1
+    SLOW_TIME = 2
+    MEGA_BOUNCE = 3
+    SHIELD = 4
+    POINTS_2X = 5
+
+class MotionPattern(Enum):
+    STATIC = 0
+    HORIZONTAL = 1
+    VERTICAL = 2
+    SINE = 3
+
+Physics = namedtuple("Physics", "gravity bounce_damping paddle_speed ball_radius")
+ObstacleSpec = namedtuple("ObstacleSpec", "x y width height speed pattern amplitude")
+Level = namedtuple("Level", "physics power_up_chance power_up_weights obstacles")
+
+USHORT_MAX = 0xFFFF
+FLOAT_MAX = 3.4e38
+
+def _require(data, key, where):
+    if key not in data:
+        raise ValueError(f"{where}: missing '{key}'")
+    return data[key]
+
+def _number(value, name, where, minimum=None, maximum=None, integer=False):
+    """Check a JSON value is a finite number within range"""
+    valid = int if integer else (int, float)
+    if isinstance(value, bool) or not isinstance(value, valid):
+        kind = "an integer" if integer else "a number"
+        raise ValueError(f"{where}: '{name}' must be {kind}, got {value!r}")
+    # Range check first: math.isfinite() overflows on huge JSON integers
+    if abs(value) > FLOAT_MAX or not math.isfinite(value):
+        raise ValueError(f"{where}: '{name}' is out of range, got {value}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{where}: '{name}' must be at least {minimum}, got {value}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{where}: '{name}' must be at most {maximum}, got {value}")
+    return value
+
+def _table(data, name, where):
+    if not isinstance(data, dict):
+        raise ValueError(f"{where}: '{name}' must be an object")
+    return data
+
+def _build_level(source, defaults, where):
+    """Merge a level entry over the defaults and validate it"""
+    _table(source, "level", where)
+    physics = dict(_table(_require(defaults, "physics", "defaults"), "physics", "defaults"))
+    physics.update(_table(source.get("physics", {}), "physics", where))
+    power_ups = dict(_table(_require(defaults, "power_ups", "defaults"), "power_ups", "defaults"))
+    power_ups.update(_table(source.get("power_ups", {}), "power_ups", where))
+
+    weights = _table(power_ups.get("weights", {}), "weights", where)
+    unknown = set(weights) - set(PowerUpType.__members__)
+    if unknown:
+        raise ValueError(f"{where}: unknown power-ups {sorted(unknown)}")
+    weight_table = tuple(float(_number(weights.get(p.name, 0), p.name, where, minimum=0))
+                         for p in PowerUpType)
+    chance = float(_number(_require(power_ups, "chance", where), "chance", where,
+                           minimum=0, maximum=1))
+    if chance > 0 and sum(weight_table) <= 0:
+        raise ValueError(f"{where}: power-ups can spawn but every weight is zero")
+
+    entries = source.get("obstacles", [])
+    if not isinstance(entries, list):
+        raise ValueError(f"{where}: 'obstacles' must be a list")
+    if len(entries) > USHORT_MAX:
+        raise ValueError(f"{where}: more than {USHORT_MAX} obstacles")
+    obstacles = []
+    for i, entry in enumerate(entries):
+        spot = f"{where}, obstacle {i}"
+        _table(entry, "obstacle", spot)
+        name = entry.get("pattern", "horizontal")
+        if not isinstance(name, str) or name.upper() not in MotionPattern.__members__:
+            raise ValueError(f"{spot}: unknown pattern {name!r}")
+        pattern = MotionPattern[name.upper()]
+        amplitude = float(_number(entry.get("amplitude", 0), "amplitude", spot, minimum=0))
+        if pattern in (MotionPattern.VERTICAL, MotionPattern.SINE) and amplitude <= 0:
+            raise ValueError(f"{spot}: {name.lower()} needs an amplitude")
+        obstacles.append(ObstacleSpec(
+            float(_number(_require(entry, "x", spot), "x", spot)),
+            float(_number(_require(entry, "y", spot), "y", spot)),
+            float(_number(_require(entry, "width", spot), "width", spot, minimum=1)),
+            float(_number(entry.get("height", 10), "height", spot, minimum=1)),
+            float(_number(entry.get("speed", 0), "speed", spot)),
+            pattern,
+            amplitude,
+        ))
+
+    return Level(
+        Physics(
+            float(_number(_require(physics, "gravity", where), "gravity", where)),
+            float(_number(_require(physics, "bounce_damping", where), "bounce_damping",
+                          where, minimum=0)),
+            _number(_require(physics, "paddle_speed", where), "paddle_speed", where,
+                    minimum=0, maximum=USHORT_MAX, integer=True),
+            _number(_require(physics, "ball_radius", where), "ball_radius", where,
+                    minimum=1, maximum=USHORT_MAX, integer=True),
+        ),
+        chance,
+        weight_table,
+        tuple(obstacles),
+    )
+
+def _encode_level(level):
+    physics = level.physics
+    parts = [LEVEL_HEADER.pack(physics.gravity, physics.bounce_damping,
+                               level.power_up_chance, physics.paddle_speed,
+                               physics.ball_radius, len(level.power_up_weights),
+                               len(level.obstacles))]
+    parts.extend(WEIGHT.pack(w) for w in level.power_up_weights)
+    parts.extend(OBSTACLE.pack(o.x, o.y, o.width, o.height, o.speed, o.amplitude,
+                               o.pattern.value) for o in level.obstacles)
+    return b"".join(parts)
+
+def _decode_level(buffer, offset, size):
+    (gravity, damping, chance, paddle_speed, ball_radius,
+     weight_count, obstacle_count) = LEVEL_HEADER.unpack_from(buffer, offset)
+    if weight_count != len(PowerUpType):
+        raise ValueError("level pack was built for a different set of power-ups")
+    if (LEVEL_HEADER.size + weight_count * WEIGHT.size +
+            obstacle_count * OBSTACLE.size) != size:
+        raise ValueError("level record size does not match its contents")
+    offset += LEVEL_HEADER.size
+    weights = tuple(WEIGHT.unpack_from(buffer, offset + i * WEIGHT.size)[0]
+                    for i in range(weight_count))
+    offset += weight_count * WEIGHT.size
+    obstacles = []
+    for _ in range(obstacle_count):
+        x, y, width, height, speed, amplitude, pattern = OBSTACLE.unpack_from(buffer, offset)
+        obstacles.append(ObstacleSpec(x, y, width, height, speed,
+                                      MotionPattern(pattern), amplitude))
+        offset += OBSTACLE.size
+    return Level(Physics(gravity, damping, paddle_speed, ball_radius),
+                 chance, weights, tuple(obstacles))
+
+def compile_levels(source_path, pack_path):
+    """Compile a JSON level set into a binary level pack"""
+    with open(source_path, "r", encoding="utf-8") as f:
+        source = json.load(f)
+    _table(source, "level set", source_path)
+    defaults = _table(_require(source, "defaults", source_path), "defaults", source_path)
+    entries = _require(source, "levels", source_path)
+    if not isinstance(entries, list):
+        raise ValueError(f"{source_path}: 'levels' must be a list")
+    if not entries:
+        raise ValueError(f"{source_path}: no levels defined")
+    if len(entries) > USHORT_MAX:
+        raise ValueError(f"{source_path}: more than {USHORT_MAX} levels")
+
+    records = [_encode_level(_build_level(entry, defaults, f"level {i + 1}"))
+               for i, entry in enumerate(entries)]
+
+    offset = PACK_HEADER.size + INDEX_ENTRY.size * len(records)
+    index = []
+    for record in records:
+        index.append(INDEX_ENTRY.pack(offset, len(record), zlib.crc32(record)))
+        offset += len(record)
+    if offset > 0xFFFFFFFF:
+        raise ValueError(f"{source_path}: level set is too large for a level pack")
+
+    # Write next to the target and swap in, so a running game never reads a half-written pack
+    tmp_path = pack_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(records)))
+        f.write(b"".join(index))
+        f.write(b"".join(records))
+    os.replace(tmp_path, pack_path)
+    return len(records)
+
+class LevelPack:
+    """Level pack decoded in full when loaded, with levels cached by content
+
+    The file is memory-mapped only for a single validation and decode pass and
+    is closed straight after, so it can be rebuilt while the game is running.
+    Changing level afterwards is a list lookup.
+    """
+    def __init__(self, path, source_path=None):
+        self.path = path
+        self.source_path = source_path
+        self._stamp, self._levels = self._load({})
+
+    def _load(self, cache):
+        """Map, validate and decode the pack, reusing cached levels whose bytes match"""
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < PACK_HEADER.size:
+                raise ValueError(f"{self.path}: not a version {PACK_VERSION} level pack")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                magic, version, count = PACK_HEADER.unpack_from(buffer, 0)
+                if magic != PACK_MAGIC or version != PACK_VERSION:
+                    raise ValueError(f"{self.path}: not a version {PACK_VERSION} level pack")
+                if count == 0:
+                    raise ValueError(f"{self.path}: level pack is empty")
+                if PACK_HEADER.size + count * INDEX_ENTRY.size > len(buffer):
+                    raise ValueError(f"{self.path}: level index is truncated")
+
+                levels = []
+                for i in range(count):
+                    offset, size, crc = INDEX_ENTRY.unpack_from(
+                        buffer, PACK_HEADER.size + i * INDEX_ENTRY.size)
+                    if offset + size > len(buffer) or size < LEVEL_HEADER.size:
+                        raise ValueError(f"{self.path}: level {i + 1} is truncated")
+                    if zlib.crc32(buffer[offset:offset + size]) != crc:
+                        raise ValueError(f"{self.path}: level {i + 1} is corrupt")
+                    key = (size, crc)
+                    level = cache.get(key)
+                    if level is None:
+                        level = _decode_level(buffer, offset, size)
+                    levels.append((key, level))
+        return (stat.st_mtime_ns, stat.st_size), levels
+
+    def refresh(self):
+        """Reload the pack if it or its source changed, keeping unchanged levels
+
+        A missing or broken pack leaves the levels already loaded in place.
+        """
+        try:
+            if self.source_path is not None:
+                compile_if_stale(self.source_path, self.path)
+            stat = os.stat(self.path)
+            if (stat.st_mtime_ns, stat.st_size) == self._stamp:
+                return
+            self._stamp, self._levels = self._load(dict(self._levels))
+        except (OSError, ValueError) as error:
+            print(f"Keeping current levels: {error}")
+
+    def __len__(self):
+        return len(self._levels)
+
+    def level(self, number):
+        """Return level data for a 1-based level number; the last level repeats"""
+        return self._levels[min(number, len(self._levels)) - 1][1]
+
+def compile_if_stale(source_path, pack_path):
+    """Recompile the pack when the source is newer; returns whether it was rebuilt"""
+    if (os.path.exists(pack_path) and
+            os.stat(pack_path).st_mtime_ns >= os.stat(source_path).st_mtime_ns):
+        return False
+    compile_levels(source_path, pack_path)
+    return True
+
+def load_level_pack(source_path, pack_path):
+    """Open the level pack, recompiling it first if the source is newer
+
+    A broken source falls back to the pack already on disk; without a usable
+    pack this returns None.
+    """
+    if os.path.exists(source_path):
+        try:
+            compile_if_stale(source_path, pack_path)
+        except (OSError, ValueError) as error:
+            print(f"Using existing level pack: {error}")
+    else:
+        source_path = None
+    if not os.path.exists(pack_path):
+        return None
+    try:
+        return LevelPack(pack_path, source_path)
+    except (OSError, ValueError) as error:
+        print(f"No usable level pack: {error}")
+        return None
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python levels.py <levels.json> <levels.pack>")
+        sys.exit(1)
+    count = compile_levels(sys.argv[1], sys.argv[2])
+    print(f"Compiled {count} levels into {sys.argv[2]}")
@@ -0,0 +1,166 @@
+import json
+import os
+
+import pytest
+
+from levels import (LevelPack, MotionPattern, PowerUpType, compile_levels,
+                    load_level_pack)
+
+DEFAULTS = {
+    "physics": {"gravity": 0.5, "bounce_damping": 0.85, "paddle_speed": 20, "ball_radius": 12},
+    "power_ups": {"chance": 0.002, "weights": {"MULTI_BALL": 1, "SHIELD": 2}},
+}
+
+def write_levels(path, levels, defaults=DEFAULTS):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"defaults": defaults, "levels": levels}, f)
+
+def bump_mtime(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "levels.json"), str(tmp_path / "levels.pack")
+
+def test_round_trip(paths):
+    source, pack = paths
+    write_levels(source, [
+        {"physics": {"gravity": 0.45}, "obstacles": [
+            {"x": 200, "y": 280, "width": 70, "speed": 3.1, "pattern": "sine", "amplitude": 60},
+            {"x": 960, "y": 380, "width": 120, "pattern": "static"},
+        ]},
+    ])
+    assert compile_levels(source, pack) == 1
+
+    level = LevelPack(pack).level(1)
+    assert level.physics.gravity == pytest.approx(0.45)
+    assert level.physics.bounce_damping == pytest.approx(0.85)
+    assert level.physics.paddle_speed == 20
+    assert level.physics.ball_radius == 12
+    assert level.power_up_chance == pytest.approx(0.002)
+    assert level.power_up_weights == (1.0, 0.0, 0.0, 2.0, 0.0)
+    assert len(level.power_up_weights) == len(PowerUpType)
+
+    sine, static = level.obstacles
+    assert sine.pattern == MotionPattern.SINE
+    assert (sine.x, sine.y, sine.width, sine.height) == (200, 280, 70, 10)
+    assert sine.speed == pytest.approx(3.1)
+    assert sine.amplitude == pytest.approx(60)
+    assert static.pattern == MotionPattern.STATIC
+    assert static.speed == 0
+
+def test_last_level_repeats(paths):
+    source, pack = paths
+    write_levels(source, [{}, {"physics": {"paddle_speed": 30}}])
+    compile_levels(source, pack)
+
+    levels = LevelPack(pack)
+    assert len(levels) == 2
+    assert levels.level(1).physics.paddle_speed == 20
+    assert levels.level(5) is levels.level(2)
+
+def test_refresh_keeps_unchanged_levels(paths):
+    source, pack = paths
+    write_levels(source, [{"physics": {"paddle_speed": 21}}, {"physics": {"paddle_speed": 22}}])
+    levels = load_level_pack(source, pack)
+    first, second = levels.level(1), levels.level(2)
+
+    write_levels(source, [{"physics": {"paddle_speed": 21}}, {"physics": {"paddle_speed": 25}}])
+    bump_mtime(source, 10)
+    levels.refresh()
+
+    assert levels.level(1) is first
+    assert levels.level(2) is not second
+    assert levels.level(2).physics.paddle_speed == 25
+
+def test_refresh_keeps_levels_when_pack_is_broken(paths):
+    source, pack = paths
+    write_levels(source, [{}])
+    compile_levels(source, pack)
+    levels = LevelPack(pack)
+    level = levels.level(1)
+
+    os.remove(pack)
+    levels.refresh()
+    assert levels.level(1) is level
+
+    with open(pack, "wb") as f:
+        f.write(b"junk")
+    levels.refresh()
+    assert levels.level(1) is level
+
+def test_corrupt_pack_is_rejected(paths):
+    source, pack = paths
+    write_levels(source, [{"obstacles": [{"x": 1, "y": 2, "width": 3}]}])
+    compile_levels(source, pack)
+    with open(pack, "rb") as f:
+        data = bytearray(f.read())
+
+    data[-1] ^= 0xFF
+    with open(pack, "wb") as f:
+        f.write(data)
+    with pytest.raises(ValueError, match="corrupt"):
+        LevelPack(pack)
+
+    with open(pack, "wb") as f:
+        f.write(data[:-4])
+    with pytest.raises(ValueError, match="truncated"):
+        LevelPack(pack)
+
+@pytest.mark.parametrize("level, message", [
+    ({"physics": {"paddle_speed": -1}}, "paddle_speed"),
+    ({"physics": {"ball_radius": 70000}}, "ball_radius"),
+    ({"physics": {"gravity": "heavy"}}, "gravity"),
+    ({"power_ups": {"weights": {"SHIELD": -1, "MULTI_BALL": 5}}}, "SHIELD"),
+    ({"power_ups": {"weights": {"LASER": 1}}}, "unknown power-ups"),
+    ({"power_ups": {"weights": {}}}, "every weight is zero"),
+    ({"obstacles": [{"x": 1, "y": 2, "width": 3, "pattern": None}]}, "unknown pattern"),
+    ({"obstacles": [{"x": 1, "y": 2, "width": 3, "pattern": "vertical"}]}, "needs an amplitude"),
+    ({"obstacles": [{"x": 1, "y": 2}]}, "missing 'width'"),
+    ({"obstacles": [{"x": 10**400, "y": 2, "width": 3}]}, "'x' is out of range"),
+    ({"obstacles": [{"x": 1e39, "y": 2, "width": 3}]}, "'x' is out of range"),
+])
+def test_bad_levels_raise_value_error(paths, level, message):
+    source, pack = paths
+    write_levels(source, [{}, level])
+    with pytest.raises(ValueError, match=message) as error:
+        compile_levels(source, pack)
+    assert "level 2" in str(error.value)
+    assert not os.path.exists(pack)
+
+@pytest.mark.parametrize("level_set, message", [
+    ({"defaults": DEFAULTS, "levels": 5}, "'levels' must be a list"),
+    ({"defaults": DEFAULTS, "levels": []}, "no levels defined"),
+    ({"defaults": 3, "levels": [{}]}, "'defaults' must be an object"),
+    ([], "'level set' must be an object"),
+    ({"defaults": DEFAULTS, "levels": [{}] * 65536}, "more than 65535 levels"),
+])
+def test_bad_level_sets_raise_value_error(paths, level_set, message):
+    source, pack = paths
+    with open(source, "w", encoding="utf-8") as f:
+        json.dump(level_set, f)
+    with pytest.raises(ValueError, match=message):
+        compile_levels(source, pack)
+    assert not os.path.exists(pack)
+
+def test_broken_source_keeps_existing_pack(paths):
+    source, pack = paths
+    write_levels(source, [{"physics": {"paddle_speed": 21}}])
+    levels = load_level_pack(source, pack)
+    level = levels.level(1)
+
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    bump_mtime(source, 10)
+    levels.refresh()
+    assert levels.level(1) is level
+
+    levels = load_level_pack(source, pack)
+    assert levels.level(1).physics.paddle_speed == 21
+
+def test_broken_source_without_pack(paths):
+    source, pack = paths
+    with open(source, "w", encoding="utf-8") as f:
+        json.dump({"defaults": DEFAULTS, "levels": 5}, f)
+    assert load_level_pack(source, pack) is None